@@ -1,13 +1,23 @@
 # Smart Traffic Management System - Flask Backend
 # Enhanced version for SIH Project Demo
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import cv2
 import threading
+import queue
 import time
 import numpy as np
 import logging
+import os
+import multiprocessing
+import json
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; classify() then runs as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
 
 app = Flask(__name__)
 CORS(app)
@@ -16,13 +26,80 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global variables
-traffic_counts = {"north": 0, "south": 0, "east": 0, "west": 0}
-traffic_counts_lock = threading.Lock()
-current_signal = "north"
-manual_override = False
-signal_timer = time.time()
-detection_active = False
+# Direction order used by array-based counts
+DIRS = ("north", "south", "east", "west")
+DIR_INDEX = {d: i for i, d in enumerate(DIRS)}
+
+class SignalState:
+    """Current green direction and when it last changed, in shared memory.
+    
+    Both the API server and the detection process switch the signal, so
+    switches go through a cross-process lock.
+    """
+    def __init__(self, initial="north"):
+        self.lock = multiprocessing.Lock()
+        self._index = multiprocessing.RawValue('b', DIR_INDEX[initial])
+        self._changed_at = multiprocessing.RawValue('d', time.time())
+    
+    @property
+    def current(self):
+        return DIRS[self._index.value]
+    
+    @property
+    def changed_at(self):
+        return self._changed_at.value
+    
+    def switch(self, direction):
+        """Switch the signal; the caller must hold self.lock"""
+        self._index.value = DIR_INDEX[direction]
+        self._changed_at.value = time.time()
+
+class CountsResponseCache:
+    """Pre-serialized /get_counts payload.
+    
+    Rebuilt only when state_version shows the detection process has
+    published new counts (or after a manual change in this process), so
+    requests usually just read the cached bytes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()  # serializes rebuilds; readers never take it
+        self._cached_response_bytes = b""
+        self._cached_at = 0.0
+        self._cached_version = -1
+    
+    def refresh(self, force=False):
+        """Rebuild the payload; unless forced, skip it if another thread already has"""
+        with self._lock:
+            version = state_version.value
+            if not force and version == self._cached_version:
+                return
+            self._cached_version = version
+            current_counts = dict(zip(DIRS, traffic_counts_arr.tolist()))
+            self._cached_at = time.time()
+            self._cached_response_bytes = json.dumps({
+                "counts": current_counts,
+                "signal": signal_state.current,
+                "manual_override": manual_override_event.is_set(),
+                "timestamp": self._cached_at,
+                "total_vehicles": sum(current_counts.values())
+            }).encode()
+    
+    def get(self):
+        if self._cached_version != state_version.value:
+            self.refresh()
+        return self._cached_response_bytes
+
+# Global variables (shared with the detection process, see run_detection_process)
+# Per-direction counts in DIRS order. The detection process is the only writer;
+# readers see whole int32 values without a lock.
+traffic_counts_shared = multiprocessing.RawArray('i', len(DIRS))
+traffic_counts_arr = np.frombuffer(traffic_counts_shared, dtype=np.int32)
+signal_state = SignalState()
+state_version = multiprocessing.RawValue('L', 0)  # bumped by detection when counts or signal change
+manual_override_event = multiprocessing.Event()
+detection_stop = multiprocessing.Event()
+detection_stop.set()  # cleared while the detection pipeline runs
+counts_response = CountsResponseCache()
 
 # AI Traffic Control Parameters
 MAX_GREEN_TIME = 30  # seconds
@@ -30,69 +107,220 @@ MIN_GREEN_TIME = 8   # seconds
 HIGH_TRAFFIC_THRESHOLD = 15
 LOW_TRAFFIC_THRESHOLD = 3
 
+# Detection pipeline parameters
+FRAME_QUEUE_SIZE = 2
+QUEUE_TIMEOUT = 0.5  # seconds
+MAX_FRAME_SKIP = 10
+BATCH_MAX_LATENCY = 0.05  # seconds to wait for every camera before detecting a batch
+TILE_GAP = 8  # blank rows between camera tiles so blobs never merge across tiles
+MAX_READ_FAILURES = 5  # consecutive failed reads before a camera is reopened
+MAX_REOPENS = 3  # reopens without a single good frame before a camera is given up
+READ_RETRY_DELAY = 0.1  # seconds, doubled per consecutive failed read
+MAX_READ_RETRY_DELAY = 2.0  # seconds
+
+def parse_video_sources(value):
+    """Parse VIDEO_SOURCES into (approach, source) pairs.
+    
+    Either a single camera that sees the whole intersection (a bare source,
+    split into N/S/E/W by position), or one camera per approach written as
+    direction=source, e.g. "north=cam_n.mp4,south=cam_s.mp4".
+    """
+    sources = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        direction, sep, source = entry.partition("=")
+        if sep and direction.strip().lower() in DIR_INDEX:
+            sources.append((direction.strip().lower(), source.strip()))
+        else:
+            sources.append((None, entry))
+    
+    approaches = [direction for direction, _ in sources if direction is not None]
+    if not sources:
+        raise ValueError("VIDEO_SOURCES lists no video sources")
+    if len(approaches) not in (0, len(sources)) or (not approaches and len(sources) > 1):
+        raise ValueError("VIDEO_SOURCES must be one whole-intersection source or direction=source entries only")
+    if len(set(approaches)) != len(approaches):
+        raise ValueError("VIDEO_SOURCES lists more than one camera for the same direction")
+    return sources
+
+# One whole-intersection video, or comma-separated direction=source entries (one per approach)
+VIDEO_SOURCES = parse_video_sources(os.environ.get("VIDEO_SOURCES", "intersection.mp4"))
+
+# Show OpenCV debug windows (set DEBUG_DISPLAY=1); off in production
+DEBUG_DISPLAY = os.environ.get("DEBUG_DISPLAY", "0").lower() in ("1", "true", "yes")
+
+@njit(cache=True)
+def classify(centroids, areas, center_x, center_y, min_area, margin, tile_stride, tile_dirs):
+    """Count blob centroids per camera tile and region, returned as (num_tiles, 4) in DIRS order.
+    
+    Tiles with tile_dirs[tile] >= 0 are approach cameras: every blob in them
+    counts towards that direction. Tiles with -1 are split by position.
+    """
+    counts = np.zeros((tile_dirs.shape[0], 4), dtype=np.int32)
+    north_thr = center_y - margin
+    south_thr = center_y + margin
+    east_thr = center_x + margin
+    west_thr = center_x - margin
+    for i in range(areas.shape[0]):
+        if areas[i] <= min_area:
+            continue
+        tile = int(centroids[i, 1] // tile_stride)
+        cx = centroids[i, 0]
+        cy = centroids[i, 1] - tile * tile_stride
+        if tile_dirs[tile] >= 0:
+            counts[tile, tile_dirs[tile]] += 1
+        # North/south take precedence over east/west
+        elif cy < north_thr:
+            counts[tile, 0] += 1
+        elif cy > south_thr:
+            counts[tile, 1] += 1
+        elif cx > east_thr:
+            counts[tile, 2] += 1
+        elif cx < west_thr:
+            counts[tile, 3] += 1
+    return counts
+
+def open_capture(source):
+    """Open a video source through FFmpeg with hardware-accelerated decoding when available"""
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG,
+                           [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+    if not cap.isOpened():
+        logger.warning(f"FFmpeg backend could not open {source}, using default backend")
+        cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        logger.error(f"Could not open video source {source}, camera will be skipped")
+    # Keep at most one buffered frame so live streams don't serve stale frames
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
 class VehicleDetector:
-    def __init__(self, video_source="intersection.mp4"):
-        self.cap = cv2.VideoCapture(video_source)
+    def __init__(self, video_sources=((None, "intersection.mp4"),)):
+        self.sources = [source for _, source in video_sources]
+        self.caps = [open_capture(source) for source in self.sources]
+        # Approach direction index per camera, -1 for a whole-intersection camera
+        self.camera_dirs = np.array([-1 if direction is None else DIR_INDEX[direction]
+                                     for direction, _ in video_sources], dtype=np.int64)
+        fps = self.caps[0].get(cv2.CAP_PROP_FPS)
+        self.frame_interval = 1.0 / (fps if fps > 0 else 30)
+        # Frames grabbed but not decoded before each processed frame
+        self.skip = 0
+        # MOG2 models every pixel independently, so one subtractor over the
+        # stacked camera tiles behaves like one subtractor per camera
         self.background_subtractor = cv2.createBackgroundSubtractorMOG2(
             history=500, 
             varThreshold=50, 
-            detectShadows=True
+            detectShadows=False
         )
         self.min_contour_area = 500
+        # Detection runs on a downscaled frame; region assignment only needs rough centroids
+        self.scale = 0.25
+        # The 5x5 full-resolution kernel scaled down too, but no smaller than 3x3 (odd size)
+        kernel_size = max(3, round(5 * self.scale) | 1)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+        # Mask buffers reused across frames, allocated on the first frame
+        self._fg = None
+        self._tmp = None
+        self._mask_size = None
+        self._gap = None
+        # Run the pixel pipeline through OpenCL (T-API) when a device is available
+        self.use_opencl = cv2.ocl.haveOpenCL()
+        cv2.ocl.setUseOpenCL(self.use_opencl)
+        logger.info(f"OpenCL acceleration {'enabled' if self.use_opencl else 'unavailable, using CPU'}")
+        
+    def batch_detect(self, frames, cameras):
+        """Detect vehicles in one frame per camera with a single pass through the pixel pipeline.
+        
+        frames[i] comes from camera cameras[i]. Returns an int32 array of
+        shape (len(frames), 4) with counts in DIRS order.
+        """
+        height, width = frames[0].shape[:2]
+        size = (round(width * self.scale), round(height * self.scale))
+        tile_stride = size[1] + TILE_GAP
+        mask_size = (size[0], len(frames) * tile_stride - TILE_GAP)
+        
+        if self._mask_size != mask_size:
+            if self.use_opencl:
+                self._fg = cv2.UMat(mask_size[1], mask_size[0], cv2.CV_8UC1)
+                self._tmp = cv2.UMat(mask_size[1], mask_size[0], cv2.CV_8UC1)
+                self._gap = cv2.UMat(np.zeros((TILE_GAP, size[0]), dtype=np.uint8))
+            else:
+                self._fg = np.empty((mask_size[1], mask_size[0]), dtype=np.uint8)
+                self._tmp = np.empty_like(self._fg)
+                self._gap = np.zeros((TILE_GAP, size[0]), dtype=np.uint8)
+            self._mask_size = mask_size
+        
+        # Downscale each camera to a common tile size and stack the tiles vertically
+        tiles = []
+        for frame in frames:
+            if self.use_opencl:
+                frame = cv2.UMat(frame)
+            if tiles:
+                tiles.append(self._gap)
+            # Downscale to cut the pixels pushed through MOG2 and morphology
+            small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            # Vehicle presence only needs luma, so MOG2 models one channel instead of three
+            tiles.append(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        batch = cv2.vconcat(tiles) if len(tiles) > 1 else tiles[0]
         
-    def detect_vehicles_in_frame(self, frame):
-        """Enhanced vehicle detection with region-based counting"""
         # Apply background subtraction
-        fg_mask = self.background_subtractor.apply(frame)
+        self.background_subtractor.apply(batch, fgmask=self._fg)
         
-        # Noise reduction
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel)
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, kernel)
+        # Noise reduction: OPEN removes specks, CLOSE fills holes and gaps inside vehicles.
+        # Ping-pong between the two preallocated buffers so nothing new is allocated.
+        cv2.morphologyEx(self._fg, cv2.MORPH_OPEN, self.kernel, dst=self._tmp)
+        fg_mask = cv2.morphologyEx(self._tmp, cv2.MORPH_CLOSE, self.kernel, dst=self._fg)
         
-        # Find contours
-        contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Label foreground blobs (label 0 is the background)
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(fg_mask, connectivity=8)
+        if self.use_opencl:
+            # Only the small per-blob arrays come back to host memory
+            stats, centroids = stats.get(), centroids.get()
         
         # Count vehicles in each direction based on frame regions
-        height, width = frame.shape[:2]
-        center_x, center_y = width // 2, height // 2
+        center_x, center_y = size[0] // 2, size[1] // 2
         
-        region_counts = {"north": 0, "south": 0, "east": 0, "west": 0}
+        # Thresholds are defined in full-resolution pixels
+        min_area = self.min_contour_area * self.scale ** 2
+        margin = 50 * self.scale
         
-        for contour in contours:
-            if cv2.contourArea(contour) > self.min_contour_area:
-                # Get contour center
-                M = cv2.moments(contour)
-                if M["m00"] != 0:
-                    cx = int(M["m10"] / M["m00"])
-                    cy = int(M["m01"] / M["m00"])
-                    
-                    # Assign to regions based on position
-                    if cy < center_y - 50:  # North region
-                        region_counts["north"] += 1
-                    elif cy > center_y + 50:  # South region
-                        region_counts["south"] += 1
-                    elif cx < center_x - 50:  # West region
-                        region_counts["west"] += 1
-                    elif cx > center_x + 50:  # East region
-                        region_counts["east"] += 1
+        # Assign blobs to cameras and regions based on position (label 0 is skipped)
+        counts = classify(centroids[1:], stats[1:, cv2.CC_STAT_AREA],
+                          center_x, center_y, min_area, margin, tile_stride,
+                          self.camera_dirs[cameras])
         
-        return region_counts, fg_mask
+        # The mask buffer is reused next frame, so only hand out a copy for debug display
+        if not DEBUG_DISPLAY:
+            return counts, None
+        return counts, fg_mask.get() if self.use_opencl else fg_mask.copy()
+    
+    def update_frame_skip(self, detection_time):
+        """Adapt frame skipping so detection keeps up with the video frame rate"""
+        if detection_time > (self.skip + 1) * self.frame_interval:
+            self.skip = min(self.skip + 1, MAX_FRAME_SKIP)
+        elif self.skip > 0 and detection_time < self.skip * self.frame_interval:
+            self.skip -= 1
 
 def ai_signal_controller():
-    """AI-based signal timing logic"""
-    global current_signal, signal_timer, traffic_counts, manual_override
-    
-    if manual_override:
-        return
+    """AI-based signal timing logic; returns True if the signal was switched"""
+    if manual_override_event.is_set():
+        return False
     
-    with traffic_counts_lock:
-        time_since_change = time.time() - signal_timer
-        current_count = traffic_counts[current_signal]
+    with signal_state.lock:
+        current_signal = signal_state.current
+        time_since_change = time.time() - signal_state.changed_at
+        
+        # No rule can switch before half the minimum green time
+        if time_since_change <= MIN_GREEN_TIME // 2:
+            return False
+        
+        current_count = int(traffic_counts_arr[DIR_INDEX[current_signal]])
         
         # Find direction with highest traffic
-        max_traffic_dir = max(traffic_counts, key=traffic_counts.get)
-        max_traffic_count = traffic_counts[max_traffic_dir]
+        max_index = int(traffic_counts_arr.argmax())
+        max_traffic_dir = DIRS[max_index]
+        max_traffic_count = int(traffic_counts_arr[max_index])
         
         should_switch = False
         new_signal = current_signal
@@ -101,7 +329,7 @@ def ai_signal_controller():
         if time_since_change > MAX_GREEN_TIME:
             should_switch = True
             new_signal = max_traffic_dir
-            logger.info(f"Max time exceeded, switching to {new_signal}")
+            logger.info("Max time exceeded, switching to %s", new_signal)
         
         # Rule 2: Current direction low traffic, other direction high traffic
         elif (time_since_change > MIN_GREEN_TIME and 
@@ -110,77 +338,244 @@ def ai_signal_controller():
               max_traffic_dir != current_signal):
             should_switch = True
             new_signal = max_traffic_dir
-            logger.info(f"Smart switch: {current_signal}({current_count}) -> {new_signal}({max_traffic_count})")
+            logger.info("Smart switch: %s(%d) -> %s(%d)",
+                        current_signal, current_count, new_signal, max_traffic_count)
         
         # Rule 3: Emergency switch for very high traffic in other direction
+        # (the early return above already guarantees half the minimum green time)
         elif (max_traffic_count > HIGH_TRAFFIC_THRESHOLD * 2 and 
-              max_traffic_dir != current_signal and
-              time_since_change > MIN_GREEN_TIME // 2):
+              max_traffic_dir != current_signal):
             should_switch = True
             new_signal = max_traffic_dir
-            logger.info(f"Emergency switch for high traffic: {new_signal}({max_traffic_count})")
+            logger.info("Emergency switch for high traffic: %s(%d)", new_signal, max_traffic_count)
         
         if should_switch:
-            current_signal = new_signal
-            signal_timer = time.time()
+            signal_state.switch(new_signal)
+        return should_switch
 
-def detection_thread():
-    """Main detection and control loop"""
-    global traffic_counts, detection_active
-    
-    detector = VehicleDetector()
-    detection_active = True
+def put_latest(frame_queue, frame):
+    """Queue a frame, dropping the oldest one when detection falls behind to keep latency low"""
+    try:
+        frame_queue.put_nowait(frame)
+    except queue.Full:
+        try:
+            frame_queue.get_nowait()
+        except queue.Empty:
+            pass
+        frame_queue.put_nowait(frame)
+
+def capture_worker(detector, camera, frame_queue):
+    """Read frames from one camera into its frame queue"""
+    cap = detector.caps[camera]
+    if not cap.isOpened():
+        return  # already reported by open_capture
     
-    logger.info("Starting vehicle detection...")
+    # Files decode as fast as the CPU allows, so play them back at their own
+    # frame rate; live streams are already paced by the camera
+    paced = cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_interval = 1.0 / (fps if fps > 0 else 30)
+    next_frame_at = time.monotonic()
+    failures = 0
+    reopens = 0
     
-    while detection_active:
-        try:
-            ret, frame = detector.cap.read()
-            
-            if not ret:
+    while not detection_stop.is_set():
+        # Grab without decoding the frames detection has no time for
+        skip = detector.skip
+        for _ in range(skip):
+            cap.grab()
+        ret, frame = cap.read()
+        
+        if not ret:
+            failures += 1
+            if failures >= MAX_READ_FAILURES:
+                # Stream dropped or file has no decodable frames
+                reopens += 1
+                if reopens > MAX_REOPENS:
+                    logger.error(f"Camera {camera} ({detector.sources[camera]}) delivers no frames, giving up")
+                    put_latest(frame_queue, None)  # tells detection to drop this camera
+                    return
+                logger.warning(f"Camera {camera} failed {failures} reads in a row, reopening {detector.sources[camera]}")
+                cap.release()
+                cap = detector.caps[camera] = open_capture(detector.sources[camera])
+                if not cap.isOpened():
+                    put_latest(frame_queue, None)  # already reported by open_capture
+                    return
+                failures = 0
+            else:
                 # Loop video for demo
-                detector.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                continue
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
             
+            # A single failure is just the end of the file; back off on repeated ones
+            if failures > 1:
+                detection_stop.wait(min(READ_RETRY_DELAY * 2 ** (failures - 2), MAX_READ_RETRY_DELAY))
+            continue
+        failures = 0
+        reopens = 0
+        
+        if paced:
+            # Skipped frames still take up video time, so the next decoded
+            # frame is due skip + 1 intervals later and capture produces
+            # frames only as fast as detection consumes them
+            next_frame_at += (skip + 1) * frame_interval
+            delay = next_frame_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Running late; don't burst to catch up
+                next_frame_at = time.monotonic()
+        
+        put_latest(frame_queue, frame)
+
+def detect_worker(detector, frame_queues, result_queue):
+    """Batch one frame per camera through detection and run signal control"""
+    frames = [None] * len(frame_queues)
+    active_cameras = []
+    # Smoothed counts kept at x10 fixed point so small counts can both rise and decay to 0
+    smoothed_x10 = np.zeros(len(DIRS), dtype=np.int64)
+    
+    while not detection_stop.is_set():
+        # Collect a frame from every camera, waiting at most BATCH_MAX_LATENCY;
+        # cameras that are late contribute their previous frame, and a camera
+        # whose capture gave up sends None and leaves the batch
+        deadline = time.monotonic() + BATCH_MAX_LATENCY
+        fresh = False
+        for i, frame_queue in enumerate(frame_queues):
+            try:
+                frames[i] = frame_queue.get(timeout=max(0, deadline - time.monotonic()))
+                fresh = True
+            except queue.Empty:
+                pass
+        
+        # Batch only the cameras that have delivered a frame, so a dead
+        # camera doesn't stall the others
+        cameras = [i for i, frame in enumerate(frames) if frame is not None]
+        if not fresh or not cameras:
+            continue
+        if cameras != active_cameras:
+            # The tile layout changes, so the background model restarts
+            logger.info(f"Detecting on {len(cameras)} of {len(frames)} camera(s): {cameras}")
+            active_cameras = cameras
+        batch = [frames[i] for i in cameras]
+        
+        try:
             # Detect vehicles
-            region_counts, fg_mask = detector.detect_vehicles_in_frame(frame)
+            start = time.perf_counter()
+            camera_counts, fg_mask = detector.batch_detect(batch, cameras)
+            detector.update_frame_skip(time.perf_counter() - start)
+            
+            # Approach cameras each fill only their own direction, so the
+            # per-camera rows add up without double counting
+            region_counts = camera_counts.sum(axis=0)
             
-            # Update global counts with smoothing
-            with traffic_counts_lock:
-                for direction in traffic_counts:
-                    # Smooth the counts to avoid rapid fluctuations
-                    old_count = traffic_counts[direction]
-                    new_count = region_counts[direction]
-                    traffic_counts[direction] = int(0.7 * old_count + 0.3 * new_count)
+            # Update global counts with smoothing (single writer, no lock needed)
+            # Smooth the counts to avoid rapid fluctuations (0.7/0.3 EWMA in integer math)
+            smoothed_x10 = (7 * smoothed_x10 + 30 * region_counts) // 10
+            smoothed = (smoothed_x10 + 5) // 10  # round only when publishing
+            counts_changed = not np.array_equal(smoothed, traffic_counts_arr)
+            traffic_counts_arr[:] = smoothed
             
             # Run AI signal controller
-            ai_signal_controller()
+            switched = ai_signal_controller()
+            
+            # Publish the update to the API server only when there is something new
+            if counts_changed or switched:
+                state_version.value += 1
             
+        except Exception as e:
+            logger.error(f"Detection error: {e}")
+            time.sleep(1)
+            continue
+        
+        if not DEBUG_DISPLAY:
+            continue
+        
+        # Block until the display stage catches up (backpressure)
+        while not detection_stop.is_set():
+            try:
+                result_queue.put((cameras, batch, region_counts, fg_mask), timeout=QUEUE_TIMEOUT)
+                break
+            except queue.Full:
+                continue
+
+def display_worker(result_queue):
+    """Draw overlays and show detection windows"""
+    while not detection_stop.is_set():
+        try:
+            cameras, frames, region_counts, fg_mask = result_queue.get(timeout=QUEUE_TIMEOUT)
+        except queue.Empty:
+            continue
+        
+        north, south, east, west = traffic_counts_arr.tolist()
+        for i, frame in zip(cameras, frames):
             # Add visual feedback (optional for demo)
-            cv2.putText(frame, f'N:{traffic_counts["north"]} S:{traffic_counts["south"]}', 
+            frame = frame.copy()  # late cameras reuse a frame, so draw on a copy
+            cv2.putText(frame, f'N:{north} S:{south}', 
                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(frame, f'E:{traffic_counts["east"]} W:{traffic_counts["west"]}', 
+            cv2.putText(frame, f'E:{east} W:{west}', 
                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(frame, f'Current: {current_signal.upper()}', 
+            cv2.putText(frame, f'Current: {signal_state.current.upper()}', 
                        (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
             
-            # Show detection (comment out for production)
-            cv2.imshow('Traffic Detection', frame)
-            cv2.imshow('Foreground Mask', fg_mask)
-            
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-                
-            time.sleep(0.1)  # Control update rate
-            
-        except Exception as e:
-            logger.error(f"Detection error: {e}")
-            time.sleep(1)
+            # Show detection
+            cv2.imshow('Traffic Detection' if i == 0 else f'Traffic Detection {i}', frame)
+        cv2.imshow('Foreground Mask', fg_mask)
+        
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            detection_stop.set()
+
+def detection_thread():
+    """Main detection and control pipeline: capture -> detect -> display"""
+    detector = VehicleDetector(VIDEO_SOURCES)
+    detection_stop.clear()
+    
+    # Bounded queues connect the stages so capture, detection and display overlap
+    frame_queues = [queue.Queue(maxsize=FRAME_QUEUE_SIZE) for _ in detector.caps]
+    result_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
     
-    detector.cap.release()
-    cv2.destroyAllWindows()
+    logger.info(f"Starting vehicle detection on {len(detector.caps)} camera(s)...")
+    
+    workers = [
+        threading.Thread(target=capture_worker, args=(detector, camera, frame_queue), daemon=True)
+        for camera, frame_queue in enumerate(frame_queues)
+    ]
+    workers.append(threading.Thread(target=detect_worker, args=(detector, frame_queues, result_queue), daemon=True))
+    if DEBUG_DISPLAY:
+        workers.append(threading.Thread(target=display_worker, args=(result_queue,), daemon=True))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    
+    for cap in detector.caps:
+        cap.release()
+    if DEBUG_DISPLAY:
+        cv2.destroyAllWindows()
     logger.info("Detection stopped")
 
+def run_detection_process(counts, signal, version, override_event, stop_event):
+    """Detection process entry point.
+    
+    Installs the shared state handed over by the parent, so the process
+    works with both fork and spawn start methods.
+    """
+    global traffic_counts_shared, traffic_counts_arr, signal_state, state_version
+    global manual_override_event, detection_stop
+    traffic_counts_shared, signal_state, state_version = counts, signal, version
+    traffic_counts_arr = np.frombuffer(traffic_counts_shared, dtype=np.int32)
+    manual_override_event, detection_stop = override_event, stop_event
+    detection_thread()
+
+def start_detection():
+    """Start the detection pipeline in a separate process"""
+    detection_process = multiprocessing.Process(
+        target=run_detection_process,
+        args=(traffic_counts_shared, signal_state, state_version, manual_override_event, detection_stop),
+        daemon=True
+    )
+    detection_process.start()
+    return detection_process
+
 # Flask API Routes
 @app.route("/")
 def home():
@@ -192,23 +587,11 @@ def home():
 @app.route("/get_counts")
 def get_counts():
     """Get current traffic counts and signal status"""
-    with traffic_counts_lock:
-        current_counts = traffic_counts.copy()
-    
-    response = {
-        "counts": current_counts,
-        "signal": current_signal,
-        "manual_override": manual_override,
-        "timestamp": time.time(),
-        "total_vehicles": sum(current_counts.values())
-    }
-    return jsonify(response)
+    return Response(counts_response.get(), mimetype='application/json')
 
 @app.route("/set_signal/<direction>", methods=['GET', 'POST'])
 def set_signal(direction):
     """Manual signal override"""
-    global current_signal, manual_override, signal_timer
-    
     valid_directions = ["north", "south", "east", "west"]
     
     if direction.lower() not in valid_directions:
@@ -217,44 +600,43 @@ def set_signal(direction):
             "message": f"Invalid direction. Use: {valid_directions}"
         }), 400
     
-    with traffic_counts_lock:
-        current_signal = direction.lower()
-        manual_override = True
-        signal_timer = time.time()
+    with signal_state.lock:
+        signal_state.switch(direction.lower())
+        manual_override_event.set()
+    counts_response.refresh(force=True)
     
     logger.info(f"Manual override activated: {direction}")
     
     return jsonify({
         "status": "success",
         "message": f"Signal manually set to {direction}",
-        "current_signal": current_signal,
-        "manual_override": manual_override
+        "current_signal": signal_state.current,
+        "manual_override": manual_override_event.is_set()
     })
 
 @app.route("/end_override", methods=['GET', 'POST'])
 def end_override():
     """End manual override and return to AI control"""
-    global manual_override
-    
-    manual_override = False
+    manual_override_event.clear()
+    counts_response.refresh(force=True)
     
     logger.info("Manual override ended, returning to AI control")
     
     return jsonify({
         "status": "success",
         "message": "Manual override ended, AI control resumed",
-        "manual_override": manual_override
+        "manual_override": manual_override_event.is_set()
     })
 
 @app.route("/system_status")
 def system_status():
     """Get system health and statistics"""
     return jsonify({
-        "detection_active": detection_active,
-        "manual_override": manual_override,
-        "current_signal": current_signal,
-        "uptime": time.time() - signal_timer,
-        "total_vehicles": sum(traffic_counts.values()),
+        "detection_active": not detection_stop.is_set(),
+        "manual_override": manual_override_event.is_set(),
+        "current_signal": signal_state.current,
+        "uptime": time.time() - signal_state.changed_at,
+        "total_vehicles": int(traffic_counts_arr.sum()),
         "high_traffic_threshold": HIGH_TRAFFIC_THRESHOLD,
         "signal_timing": {
             "max_green_time": MAX_GREEN_TIME,
@@ -263,10 +645,14 @@ def system_status():
     })
 
 if __name__ == "__main__":
-    # Start detection thread
-    detection_thread_obj = threading.Thread(target=detection_thread, daemon=True)
-    detection_thread_obj.start()
+    from waitress import serve
+    
+    # Start detection process
+    start_detection()
     
-    # Start Flask server
-    logger.info("Starting Flask server on http://127.0.0.1:5000")
-    app.run(host='127.0.0.1', port=5000, debug=False, use_reloader=False)
\ No newline at end of file
+    # Serve the API from a thread pool instead of the single-threaded dev server
+    logger.info("Starting server on http://127.0.0.1:5000")
+    try:
+        serve(app, host='127.0.0.1', port=5000, threads=8)
+    finally:
+        detection_stop.set()
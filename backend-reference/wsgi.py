@@ -0,0 +1,7 @@
+# WSGI entry point for production servers, e.g.
+#   gunicorn -k gthread --threads 8 -w 1 wsgi:app
+# Keep a single worker (and no --preload) so exactly one detection process runs.
+
+from improved_app import app, start_detection
+
+start_detection()